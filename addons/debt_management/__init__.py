@@ -40,10 +40,16 @@ def read_bank_names_from_excel(excel_file):
         return []
 
 
+def clean_bank_names(bank_names):
+    # Drop empty cells (NaN in pandas) so one bad row does not fail the whole file
+    return [str(bank_name).strip() for bank_name in bank_names
+            if not pd.isna(bank_name) and str(bank_name).strip()]
+
+
 def insert_bank_names_to_res_bank(env, bank_names):
     try:
-        for bank_name in bank_names:
-            env['res.bank'].create({'name': bank_name})
-            print(f"Inserted bank name: {bank_name}")
+        bank_names = clean_bank_names(bank_names)
+        env['res.bank'].create([{'name': bank_name} for bank_name in bank_names])
+        print(f"Inserted {len(bank_names)} bank names")
     except Exception as e:
-        print(f"Error inserting bank name {bank_name}: {e}")
\ No newline at end of file
+        print(f"Error inserting bank names: {e}")
\ No newline at end of file
@@ -1,2 +1,4 @@
 from . import debt_details
 from . import debt_emi_history
+from . import res_bank
+from . import debt_export
@@ -1,11 +1,19 @@
 import io
 import math
+import hashlib
 import xlsxwriter
 import base64
 from odoo import api, fields, models
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
 from dateutil.relativedelta import relativedelta
 from datetime import date, timedelta
 
+EMI_REPORT_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EMI_REPORT_KEY_PREFIX = 'emi_report:'
+EMI_REPORT_RETENTION_PARAM = 'debt_management.emi_report_retention_days'
+EMI_REPORT_RETENTION_DAYS = 7
+
 
 class DebtDetails(models.Model):
     _name = 'debt.details'
@@ -78,6 +86,10 @@ class DebtDetails(models.Model):
         ('unique_loan_no', 'UNIQUE(loan_no)', 'The loan number must be unique!')
     ]
 
+    def init(self):
+        # Serves the (write_date, id) keyset pagination of the incremental export
+        create_index(self.env.cr, 'debt_details_write_date_id_index', self._table, ['write_date', 'id'])
+
     ##### Compute Methods #########
     @api.depends('emi_remaining', 'emi_amount', 'advance_amount')
     def _compute_debt_paid(self):
@@ -180,16 +192,23 @@ class DebtDetails(models.Model):
             else:
                 record.last_date = False
 
+    def _get_paid_emi_counts(self):
+        """
+        Return a dict mapping each loan id of self to its number of paid EMIs,
+        fetched in a single grouped query instead of one query per loan.
+        """
+        paid_groups = self.env['debt.emi.history']._read_group(
+            [('loan_id', 'in', self._origin.ids), ('payment_status', '=', 'paid')],
+            groupby=['loan_id'], aggregates=['__count'])
+        return {loan.id: count for loan, count in paid_groups}
+
     @api.depends('first_emi', 'loan_tenor')
     def _compute_emi_remaining(self):
+        paid_counts = self._get_paid_emi_counts()
         for record in self:
             if record.first_emi and record.loan_tenor > 0:
-                # Query the debt.emi.history model for the current loan
-                emi_history = self.env['debt.emi.history'].search([('loan_id', '=', record.id)])
-
                 # Count the number of EMIs already paid (or created).
-                # You can modify the condition here based on how the status is set (e.g., 'paid' status)
-                paid_emis = sum(1 for emi in emi_history if emi.payment_status == 'paid')
+                paid_emis = paid_counts.get(record._origin.id, 0)
 
                 # Calculate the remaining EMIs
                 record.emi_remaining = max(0, record.loan_tenor - paid_emis)
@@ -198,12 +217,9 @@ class DebtDetails(models.Model):
 
     @api.depends('emi_remaining')
     def _compute_emi_paid(self):
+        paid_counts = self._get_paid_emi_counts()
         for record in self:
-            emi_count = self.env['debt.emi.history'].search_count([
-                ('loan_id', '=', record.id),
-                ('payment_status', '=', 'paid')
-            ])
-            record.emi_paid = emi_count
+            record.emi_paid = paid_counts.get(record._origin.id, 0)
 
     @api.depends('actual_amount', 'interest_rate', 'loan_tenor')
     def _compute_total_debt(self):
@@ -244,41 +260,45 @@ class DebtDetails(models.Model):
         self._compute_emi_amount()  # Recalculate EMI amounts
 
     # Methods creating Emi Records
-    @api.model
-    def create(self, vals):
-        # Create the loan record
-        loan = super(DebtDetails, self).create(vals)
-        loan.principal_amount = loan.actual_amount
-        # Ensure EMI amount is calculated before creating EMI records
-        if loan.loan_tenor > 0 and loan.first_emi and loan.emi_amount > 0:
-            # Generate EMI records for the entire loan tenure up until today
-            today = fields.Date.today()
-
-            # Check if advance_type is 'full' and skip creating future EMIs
-            if loan.advance_type == 'full':
-                # For full advance, we do not create future EMI records
-                loan.emi_remaining = 0
-                loan.emi_date = False
-            else:
-                # Generate EMI records for each month in the loan tenure
-                for month in range(loan.loan_tenor):
-                    due_date = loan.first_emi + relativedelta(months=month)
-
-                    # Only create EMI records up to today's date (skip future months)
-                    if due_date <= today:
-                        # Create EMI record in the debt.emi.history model
-                        self.env['debt.emi.history'].create({
-                            'loan_id': loan.id,
-                            'due_date': due_date,
-                            'payment_amount': loan.emi_amount,  # The EMI amount
-                            'payment_status': 'paid',  # Initially marked as paid
-                        })
-                    else:
-                        break
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Create the loan records
+        loans = super(DebtDetails, self).create(vals_list)
+        for loan in loans:
+            loan.principal_amount = loan.actual_amount
 
-        return loan
+        today = fields.Date.today()
+        emi_vals_list = []
+        for loan in loans:
+            # Ensure EMI amount is calculated before creating EMI records
+            if loan.loan_tenor > 0 and loan.first_emi and loan.emi_amount > 0:
+                # Check if advance_type is 'full' and skip creating future EMIs
+                if loan.advance_type == 'full':
+                    # For full advance, we do not create future EMI records
+                    loan.emi_remaining = 0
+                    loan.emi_date = False
+                else:
+                    # Generate EMI records for the entire loan tenure up until today
+                    for month in range(loan.loan_tenor):
+                        due_date = loan.first_emi + relativedelta(months=month)
+
+                        # Only create EMI records up to today's date (skip future months)
+                        if due_date <= today:
+                            emi_vals_list.append({
+                                'loan_id': loan.id,
+                                'due_date': due_date,
+                                'payment_amount': loan.emi_amount,  # The EMI amount
+                                'payment_status': 'paid',  # Initially marked as paid
+                            })
+                        else:
+                            break
+
+        # Create the EMI records of all loans in the debt.emi.history model at once
+        self.env['debt.emi.history'].create(emi_vals_list)
+        return loans
 
     def action_done(self):
+        emi_vals_list = []
         for rec in self:
             # If the loan is marked as completed, create an EMI history record with the final closing balance
             if rec.advance_type == 'full':
@@ -289,7 +309,7 @@ class DebtDetails(models.Model):
                 rec.emi_date = False
                 print(rec.total_payable)
                 # For 'full' advance_type, create the last EMI record with the closing balance (total_payable)
-                self.env['debt.emi.history'].create({
+                emi_vals_list.append({
                     'loan_id': rec.id,
                     'due_date': fields.Date.today(),  # Use current date if emi_date is not set
                     'payment_amount': 0,
@@ -302,7 +322,7 @@ class DebtDetails(models.Model):
                 rec.advance_type = False
             elif rec.advance_type == 'partial':
                 rec.emi_paid += 1
-                self.env['debt.emi.history'].create({
+                emi_vals_list.append({
                     'loan_id': rec.id,
                     'due_date': fields.Date.today(),  # Use current date if emi_date is not set
                     'payment_amount': 0,
@@ -327,7 +347,7 @@ class DebtDetails(models.Model):
 
                     # Recalculate EMI only if the principal has changed
                     if rec.principal_amount != initial_principal:
-                        self._compute_emi_amount()
+                        rec._compute_emi_amount()
                 else:
                     rec.remaining_debt -= rec.total_payable
                     # Ensure remaining debt doesn't go negative
@@ -339,13 +359,17 @@ class DebtDetails(models.Model):
                 rec.advance_amount = False
                 rec.advance_type = False
 
+        # Create the EMI history records of all loans at once
+        self.env['debt.emi.history'].create(emi_vals_list)
+
     # Compute the total advance payment across all related EMI records
     def _compute_total_advance_payment(self):
+        # Calculate the total advance payments made for all loans in one grouped query
+        advance_groups = self.env['debt.emi.history']._read_group(
+            [('loan_id', 'in', self._origin.ids)], groupby=['loan_id'], aggregates=['advance_payment:sum'])
+        advance_totals = {loan.id: total for loan, total in advance_groups}
         for record in self:
-            # Calculate the total advance payments made for the loan
-            total_advance_payment = sum(
-                emi.advance_payment for emi in self.env['debt.emi.history'].search([('loan_id', '=', record.id)]))
-            record.total_advance_payment = total_advance_payment
+            record.total_advance_payment = advance_totals.get(record._origin.id, 0.0)
 
     @api.onchange('actual_amount')
     # Method to update the principal amount based on the total advance payments
@@ -369,6 +393,7 @@ class DebtDetails(models.Model):
         # Find all loans that have a valid first_emi
         loans = self.search([('first_emi', '!=', False)])
 
+        emi_vals_list = []
         for loan in loans:
             first_emi_date = fields.Date.from_string(loan.first_emi)
             if current_date < first_emi_date:
@@ -381,34 +406,39 @@ class DebtDetails(models.Model):
                 next_emi_date = first_emi_date + relativedelta(months=next_emi_months)
 
                 if current_date == loan.emi_date:
+                    # Record the EMI due today before moving on to the next one
+                    if loan.advance_type != 'full':
+                        emi_vals_list.append({
+                            'loan_id': loan.id,
+                            'due_date': current_date,
+                            'payment_amount': loan.emi_amount,  # The EMI amount
+                            'payment_status': 'paid',  # Initially marked as paid
+                        })
 
                     # Ensure that we don't exceed the loan tenor
                     if next_emi_months <= loan.loan_tenor:
                         loan.emi_date = next_emi_date
-
-                        # Check if the next EMI date matches today's date
-                        if loan.emi_date == current_date and loan.advance_type != 'full':
-                            # Create a new record in the debt.emi.history model
-                            self.env['debt.emi.history'].create({
-                                'loan_id': loan.id,
-                                'due_date': current_date,
-                                'payment_amount': loan.emi_amount,  # The EMI amount
-                                'payment_status': 'paid',  # Initially marked as paid
-                            })
                     else:
                         loan.emi_date = False
 
+        # Create the new records in the debt.emi.history model at once
+        self.env['debt.emi.history'].create(emi_vals_list)
+
     def send_emi_reminder_email(self):
         today = date.today()
+        # The cron calls this method on an empty recordset, check every loan then
+        records = self or self.search([('emi_date', '!=', False)])
         # Iterate over all debt records and check if the reminder is due
-        for record in self:
+        due_records = self.browse()
+        for record in records:
             if record.emi_date:
                 reminder_date = record.emi_date - timedelta(days=record.reminder_days)
-                print(reminder_date)
                 if reminder_date == today:
-                    # Send email logic here
-                    template = self.env.ref('debt_management.email_template')
-                    self.env['mail.template'].browse(template.id).send_mail(record.id, force_send=True)
+                    due_records |= record
+        if due_records:
+            # Queue all the reminders at once, the mail queue cron sends them
+            template = self.env.ref('debt_management.email_template')
+            template.send_mail_batch(due_records.ids)
 
     # View for Emi Records
     def action_view_emi(self):
@@ -422,11 +452,45 @@ class DebtDetails(models.Model):
         }
 
     ## Excel Report Generating Method
+    def _get_emi_report_key(self):
+        """
+        Return the cache key of the EMI report for this loan. The key is a hash of the
+        loan's own write_date, its bank (printed on every row) and the latest write_date
+        and row count of its EMI history, so it only changes when the report content can.
+        """
+        self.ensure_one()
+        [(last_write, row_count)] = self.env['debt.emi.history']._read_group(
+            [('loan_id', '=', self.id)], aggregates=['write_date:max', '__count'])
+        bank = self.loan_bank
+        fingerprint = f'{self.id}|{self.write_date}|{bank.id}|{bank.name}|{bank.write_date}|{last_write}|{row_count}'
+        return EMI_REPORT_KEY_PREFIX + hashlib.sha1(fingerprint.encode()).hexdigest()
+
     def action_generate_emi_report(self):
         """
         This method generates the Excel report for the EMI history of the loan.
+        A previously generated report is reused as long as the loan history is unchanged.
         """
+        self.ensure_one()
+        report_key = self._get_emi_report_key()
+        attachment = self.env['ir.attachment'].search([
+            ('res_model', '=', 'debt.details'),
+            ('res_id', '=', self.id),
+            ('description', '=', report_key),
+        ], limit=1)
+        if not attachment:
+            attachment = self._create_emi_report_attachment(report_key)
+
+        # Return the attachment so the user can download it
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{attachment.id}?download=true',
+            'target': 'self',
+        }
 
+    def _create_emi_report_attachment(self, report_key):
+        """
+        Build the EMI history workbook and store it as an attachment tagged with report_key.
+        """
         # Create a workbook in memory
         output = io.BytesIO()
         workbook = xlsxwriter.Workbook(output)
@@ -446,6 +510,10 @@ class DebtDetails(models.Model):
         worksheet.write(0, 6, 'Interest Rate (%)')
         worksheet.write(0, 7, 'Loan Type')
 
+        # Loan level values are the same on every row
+        bank_name = self.loan_bank.name if self.loan_bank else 'No Bank'
+        loan_type = dict(self._fields['loan_type'].selection).get(self.loan_type)
+
         # Fill in the data rows
         row = 1
         for emi in emi_records:
@@ -454,10 +522,9 @@ class DebtDetails(models.Model):
             worksheet.write(row, 2, emi.advance_payment)
             worksheet.write(row, 3, emi.remaining_debt)
             worksheet.write(row, 4, emi.payment_status)
-            worksheet.write(row, 5, emi.loan_id.loan_bank.name if emi.loan_id.loan_bank else 'No Bank')  # Bank Name
-            worksheet.write(row, 6, emi.loan_id.interest_rate)  # Interest Rate
-            worksheet.write(row, 7,
-                            dict(emi.loan_id._fields['loan_type'].selection).get(emi.loan_id.loan_type))  # Loan Type
+            worksheet.write(row, 5, bank_name)  # Bank Name
+            worksheet.write(row, 6, self.interest_rate)  # Interest Rate
+            worksheet.write(row, 7, loan_type)  # Loan Type
 
             print(f'Emi paid {emi.payment_amount}')
             row += 1
@@ -469,21 +536,40 @@ class DebtDetails(models.Model):
         excel_file = base64.b64encode(output.getvalue())
 
         # Create an attachment to store the Excel file
-        attachment = self.env['ir.attachment'].create({
+        return self.env['ir.attachment'].create({
             'name': f'EMI_History_{self.loan_no}.xlsx',
             'type': 'binary',
             'datas': excel_file,
-            'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            'mimetype': EMI_REPORT_MIMETYPE,
+            'description': report_key,
             'res_model': 'debt.details',
             'res_id': self.id,
         })
 
-        # Return the attachment so the user can download it
-        return {
-            'type': 'ir.actions.act_url',
-            'url': f'/web/content/{attachment.id}?download=true',
-            'target': 'self',
-        }
+    @api.model
+    def gc_emi_report_attachments(self):
+        """
+        Cron job removing superseded EMI report attachments. The latest report of each loan
+        is always kept; an older one is deleted once the report that superseded it is older
+        than the retention period.
+        """
+        retention_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            EMI_REPORT_RETENTION_PARAM, EMI_REPORT_RETENTION_DAYS))
+        cutoff = fields.Datetime.now() - timedelta(days=retention_days)
+
+        # Only consider attachments created by the report cache, tagged with a report key.
+        # superseded_at is the create_date of the next newer report of the same loan.
+        Attachment = self.env['ir.attachment'].sudo()
+        Attachment.flush_model(['res_model', 'res_id', 'description'])
+        self.env.cr.execute(SQL("""
+            SELECT id FROM (
+                SELECT id, lag(create_date) OVER (PARTITION BY res_id ORDER BY id DESC) AS superseded_at
+                  FROM ir_attachment
+                 WHERE res_model = 'debt.details' AND description LIKE %s
+            ) AS reports
+            WHERE superseded_at < %s
+        """, f'{EMI_REPORT_KEY_PREFIX}%', cutoff))
+        Attachment.browse([row[0] for row in self.env.cr.fetchall()]).unlink()
 
     ######### Constrains ##########
     @api.constrains('starting_date', 'first_emi')
@@ -1,4 +1,7 @@
+from collections import defaultdict
+
 from odoo import api, fields, models
+from odoo.tools.sql import create_index
 
 
 class EmiPayment(models.Model):
@@ -15,14 +18,23 @@ class EmiPayment(models.Model):
         ('missed', 'Missed')
     ], string='Payment Status', default='paid')
 
+    def init(self):
+        # Serves the (write_date, id) keyset pagination of the incremental export
+        create_index(self.env.cr, 'debt_emi_history_write_date_id_index', self._table, ['write_date', 'id'])
+
     @api.depends('payment_amount', 'advance_payment', 'loan_id.total_debt', 'due_date')
     def _compute_remaining_debt(self):
+        # Get all EMI records of the loans in self at once, ordered by due date
+        loan_emi_records = defaultdict(list)
+        for emi in self.env['debt.emi.history'].search([('loan_id', 'in', self.loan_id.ids)], order='due_date'):
+            loan_emi_records[emi.loan_id.id].append(emi)
+
         for record in self:
-            # Get all EMI records for this loan ordered by due date
-            emi_records = self.env['debt.emi.history'].search([
-                ('loan_id', '=', record.loan_id.id),
-                ('due_date', '<=', record.due_date)
-            ], order='due_date')
+            # Keep the EMI records of this loan up to this record's due date
+            emi_records = [
+                emi for emi in loan_emi_records[record.loan_id.id]
+                if record.due_date and emi.due_date <= record.due_date
+            ]
 
             # Calculate the total amount paid up to this EMI record (including advance payments)
             total_paid = 0.0
@@ -0,0 +1,215 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import uuid
+from datetime import timedelta
+from odoo import api, fields, models
+from odoo.tools import SQL, config
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_MODELS = ['debt.details', 'debt.emi.history']
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_PATH_PARAM = 'debt_management.export_path'
+EXPORT_WATERMARK_PARAM = 'debt_management.export_watermark.%s'
+EXPORT_LAG_PARAM = 'debt_management.export_lag_minutes'
+EXPORT_LAG_MINUTES = 60
+EXPORT_SKIPPED_TYPES = ('binary', 'one2many', 'many2many', 'html', 'properties', 'json')
+
+
+class DebtExport(models.AbstractModel):
+    _name = 'debt.export'
+    _description = 'Debt Incremental Export'
+
+    @api.model
+    def export_changes(self):
+        """
+        Cron job exporting the loans and EMI history changed since the last run.
+        Rows are selected with a persisted (write_date, id) watermark per model and
+        streamed in chunks to compressed Parquet files, or gzipped CSV when pyarrow
+        is not installed. Each run gets its own folder with a manifest.json.
+
+        write_date is the start time of the writing transaction, so a transaction still
+        running during the export can later commit rows below the watermark. Only rows
+        older than a safety lag are exported; newer ones are picked up by the next run.
+        Transactions running longer than the lag can still be missed.
+        """
+        now = fields.Datetime.now()
+        # The random suffix keeps runs started within the same second apart
+        run_id = f"{now.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        run_path = os.path.join(self._get_export_path(), run_id)
+        # Fail rather than overwrite the files of another run
+        os.makedirs(run_path)
+
+        lag_minutes = int(self.env['ir.config_parameter'].sudo().get_param(EXPORT_LAG_PARAM, EXPORT_LAG_MINUTES))
+        upper_bound = now - timedelta(minutes=lag_minutes)
+
+        manifest = {
+            'run_id': run_id,
+            'database': self.env.cr.dbname,
+            'format': 'parquet' if pa else 'csv',
+            'write_date_before': fields.Datetime.to_string(upper_bound),
+            'models': [],
+        }
+        new_watermarks = {}
+        for model_name in EXPORT_MODELS:
+            watermark = self._get_watermark(model_name)
+            file_name, row_count, new_watermark = self._export_model(
+                model_name, watermark, upper_bound, run_path)
+            manifest['models'].append({
+                'model': model_name,
+                'file': file_name,
+                'rows': row_count,
+                'watermark_from': watermark,
+                'watermark_to': new_watermark,
+            })
+            new_watermarks[model_name] = new_watermark
+
+        with open(os.path.join(run_path, 'manifest.json'), 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        # Only move the watermarks once every file and the manifest are written
+        for model_name, watermark in new_watermarks.items():
+            self._set_watermark(model_name, watermark)
+        _logger.info("Debt export %s written to %s", run_id, run_path)
+        return manifest
+
+    @api.model
+    def _get_export_path(self):
+        default_path = os.path.join(config['data_dir'], 'debt_exports', self.env.cr.dbname)
+        return self.env['ir.config_parameter'].sudo().get_param(EXPORT_PATH_PARAM, default_path)
+
+    @api.model
+    def _get_watermark(self, model_name):
+        value = self.env['ir.config_parameter'].sudo().get_param(EXPORT_WATERMARK_PARAM % model_name)
+        return json.loads(value) if value else None
+
+    @api.model
+    def _set_watermark(self, model_name, watermark):
+        if watermark:
+            self.env['ir.config_parameter'].sudo().set_param(EXPORT_WATERMARK_PARAM % model_name,
+                                                             json.dumps(watermark))
+
+    @api.model
+    def _get_export_fields(self, model_name):
+        model_fields = self.env[model_name]._fields
+        return [
+            name for name, field in model_fields.items()
+            if field.store and field.type not in EXPORT_SKIPPED_TYPES
+        ]
+
+    @api.model
+    def _export_model(self, model_name, watermark, upper_bound, run_path):
+        """
+        Stream the rows of model_name changed after watermark and before upper_bound
+        into a file of run_path. Return the file name, the number of rows written and
+        the new watermark.
+        """
+        model = self.env[model_name].sudo().with_context(active_test=False)
+        field_names = self._get_export_fields(model_name)
+        base_name = model_name.replace('.', '_')
+        writer = self._open_writer(model, field_names, os.path.join(run_path, base_name))
+        model.flush_model()
+
+        row_count = 0
+        try:
+            while True:
+                # Keyset pagination on (write_date, id), served by the index created in the
+                # models' init(). The raw write_date keeps the watermark's microseconds.
+                after = SQL("TRUE")
+                if watermark:
+                    after = SQL("(write_date, id) > (%s::timestamp, %s)", watermark['write_date'], watermark['id'])
+                self.env.cr.execute(SQL(
+                    "SELECT id, write_date FROM %s WHERE %s AND write_date < %s ORDER BY write_date, id LIMIT %s",
+                    SQL.identifier(model._table), after, upper_bound, EXPORT_CHUNK_SIZE,
+                ))
+                changes = self.env.cr.fetchall()
+                if not changes:
+                    break
+
+                rows = model.browse([row[0] for row in changes]).read(field_names)
+                writer.write([self._flatten_row(row, model) for row in rows])
+                row_count += len(rows)
+                last_id, last_write_date = changes[-1]
+                watermark = {'write_date': last_write_date.isoformat(sep=' '), 'id': last_id}
+                # Drop the chunk from the cache so memory stays flat on large exports
+                model.invalidate_model()
+        finally:
+            writer.close()
+        return os.path.basename(writer.path), row_count, watermark
+
+    @api.model
+    def _flatten_row(self, row, model):
+        flat_row = {}
+        for name, value in row.items():
+            field = model._fields[name]
+            if field.type == 'many2one':
+                value = value[0] if value else None
+            elif value is False and field.type != 'boolean':
+                value = None
+            flat_row[name] = value
+        return flat_row
+
+    @api.model
+    def _open_writer(self, model, field_names, base_path):
+        if pa:
+            return _ParquetWriter(base_path + '.parquet', model, field_names)
+        return _CsvWriter(base_path + '.csv.gz', field_names)
+
+
+class _ParquetWriter:
+    """ Write chunks of rows as row groups of a zstd compressed Parquet file. """
+
+    ARROW_TYPES = {
+        'char': 'string',
+        'text': 'string',
+        'selection': 'string',
+        'integer': 'int64',
+        'many2one': 'int64',
+        'float': 'float64',
+        'monetary': 'float64',
+        'boolean': 'bool_',
+        'date': 'date32',
+    }
+
+    def __init__(self, path, model, field_names):
+        self.path = path
+        self.schema = pa.schema([
+            (name, self._arrow_type(model._fields[name])) for name in field_names
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def _arrow_type(self, field):
+        if field.type == 'datetime':
+            return pa.timestamp('us')
+        return getattr(pa, self.ARROW_TYPES.get(field.type, 'string'))()
+
+    def write(self, rows):
+        self.writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _CsvWriter:
+    """ Write chunks of rows to a gzipped CSV file, used when pyarrow is not installed. """
+
+    def __init__(self, path, field_names):
+        self.path = path
+        self.file = gzip.open(path, 'wt', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=field_names)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
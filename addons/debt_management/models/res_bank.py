@@ -0,0 +1,108 @@
+import re
+import unicodedata
+from odoo import api, fields, models, tools
+
+# Candidates fetched per missing fuzzy match when a domain may filter some of them out
+BANK_FUZZY_OVERFETCH = 5
+
+
+def normalize_bank_name(name):
+    """
+    Normalize a bank name for lookups: lowercase, accents removed and
+    punctuation collapsed into single spaces.
+    """
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[\W_]+', ' ', name.lower()).split())
+
+
+class ResBank(models.Model):
+    _inherit = 'res.bank'
+
+    normalized_name = fields.Char(string="Normalized Name", compute='_compute_normalized_name', store=True,
+                                  index='trigram')
+
+    @api.depends('name')
+    def _compute_normalized_name(self):
+        for bank in self:
+            bank.normalized_name = normalize_bank_name(bank.name)
+
+    # The ranked lookups are cached in the registry's ormcache, which Odoo invalidates
+    # on every worker. Clearing it also drops the other ormcached entries, which is
+    # acceptable because the bank list only changes on imports and rare edits.
+    @api.model_create_multi
+    def create(self, vals_list):
+        banks = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return banks
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'name', 'bic', 'active'} & set(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        """
+        Rank the banks matching name: BIC codes and names starting with it first, then
+        names containing it, then fuzzy trigram matches. Plain lookups without a domain
+        are cached.
+        """
+        normalized = normalize_bank_name(name)
+        if operator != 'ilike' or not normalized or not limit:
+            return super().name_search(name, domain, operator, limit)
+
+        if domain or not self.env.context.get('active_test', True):
+            bank_ids = self._search_ranked_bank_ids(normalized, list(domain or []), limit)
+        else:
+            bank_ids = self._search_ranked_bank_ids_cached(normalized, limit)
+        return [(bank.id, bank.display_name) for bank in self.browse(bank_ids)]
+
+    @api.model
+    @tools.ormcache('normalized', 'limit')
+    def _search_ranked_bank_ids_cached(self, normalized, limit):
+        return tuple(self._search_ranked_bank_ids(normalized, [], limit))
+
+    @api.model
+    def _search_ranked_bank_ids(self, normalized, domain, limit):
+        # BIC/IFSC codes and names starting with the search term
+        bank_ids = list(self._search(
+            ['|', ('bic', '=ilike', f'{normalized}%'), ('normalized_name', '=like', f'{normalized}%')] + domain,
+            limit=limit, order='normalized_name',
+        ).get_result_ids())
+
+        # Names containing the search term anywhere
+        if len(bank_ids) < limit:
+            bank_ids += self._search(
+                [('normalized_name', 'like', normalized), ('id', 'not in', bank_ids)] + domain,
+                limit=limit - len(bank_ids), order='normalized_name',
+            ).get_result_ids()
+
+        # Fuzzy matches ranked by trigram similarity, to tolerate typos. The % operator
+        # is what the trigram index serves; the SQL wrapper cannot escape it, hence the
+        # plain query.
+        if len(bank_ids) < limit and self.env.registry.has_trigram:
+            missing = limit - len(bank_ids)
+            self.flush_model(['normalized_name', 'active'])
+            self.env.cr.execute("""
+                SELECT id FROM res_bank
+                 WHERE normalized_name %% %s AND (active OR NOT %s) AND NOT (id = ANY(%s))
+                 ORDER BY similarity(normalized_name, %s) DESC, id
+                 LIMIT %s
+            """, [normalized, self.env.context.get('active_test', True), bank_ids, normalized,
+                  missing * BANK_FUZZY_OVERFETCH if domain else missing])
+            fuzzy_ids = [row[0] for row in self.env.cr.fetchall()]
+            if domain:
+                # Apply the domain while keeping the similarity order
+                allowed_ids = set(self._search([('id', 'in', fuzzy_ids)] + domain).get_result_ids())
+                fuzzy_ids = [bank_id for bank_id in fuzzy_ids if bank_id in allowed_ids]
+            bank_ids += fuzzy_ids[:missing]
+        return bank_ids
@@ -0,0 +1,4 @@
+from . import test_emi_report
+from . import test_query_counts
+from . import test_res_bank
+from . import test_debt_export
@@ -0,0 +1,81 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+from odoo.addons.debt_management.models.debt_export import pq
+
+
+@tagged('post_install', '-at_install')
+class TestDebtExport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.export_dir = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.export_dir)
+        cls.env['ir.config_parameter'].set_param('debt_management.export_path', cls.export_dir)
+        cls.env['ir.config_parameter'].set_param('debt_management.export_lag_minutes', 0)
+        today = fields.Date.today()
+        cls.bank = cls.env['res.bank'].create({'name': 'Export Bank'})
+        cls.loan_a, cls.loan_b, cls.loan_c, cls.loan_late = cls.env['debt.details'].create([{
+            'loan_no': f'EXPORT-{index}',
+            'loan_type': 'personal',
+            'loan_bank': cls.bank.id,
+            'sanctioned_amount': 100000,
+            'actual_amount': 100000,
+            'loan_tenor': 24,
+            'starting_date': today,
+            'first_emi': today,
+        } for index in range(4)])
+
+    def _set_write_date(self, loans, hours_ago):
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE debt_details SET write_date = %s WHERE id IN %s",
+                            [fields.Datetime.now() - timedelta(hours=hours_ago), tuple(loans.ids)])
+        self.env.invalidate_all()
+
+    def _export_loans(self):
+        """ Run the export and return its manifest entry and rows for debt.details. """
+        manifest = self.env['debt.export'].export_changes()
+        run_path = os.path.join(self.export_dir, manifest['run_id'])
+        with open(os.path.join(run_path, 'manifest.json')) as manifest_file:
+            self.assertEqual(json.load(manifest_file), manifest)
+
+        loans = next(entry for entry in manifest['models'] if entry['model'] == 'debt.details')
+        path = os.path.join(run_path, loans['file'])
+        if path.endswith('.parquet'):
+            rows = pq.read_table(path).to_pylist()
+        else:
+            with gzip.open(path, 'rt', newline='') as export_file:
+                rows = list(csv.DictReader(export_file))
+        self.assertEqual(len(rows), loans['rows'])
+        return loans, rows
+
+    def test_incremental_export(self):
+        self._set_write_date(self.loan_late, 4)
+        self._set_write_date(self.loan_a, 3)
+        self._set_write_date(self.loan_b | self.loan_c, 2)
+
+        loans, rows = self._export_loans()
+        rows_by_id = {int(row['id']): row for row in rows}
+        self.assertLessEqual(set((self.loan_a | self.loan_b | self.loan_c | self.loan_late).ids), set(rows_by_id))
+        self.assertEqual(rows_by_id[self.loan_a.id]['loan_no'], 'EXPORT-0')
+        self.assertEqual(int(rows_by_id[self.loan_a.id]['loan_bank']), self.bank.id)
+        self.assertIn('write_date', rows_by_id[self.loan_a.id])
+        self.assertEqual(loans['watermark_to']['id'], self.loan_c.id)
+
+        # loan_a changed after the watermark, loan_late changed before it: only loan_a is exported
+        self._set_write_date(self.loan_a, 1)
+        self._set_write_date(self.loan_late, 2.5)
+        loans, rows = self._export_loans()
+        self.assertEqual([int(row['id']) for row in rows], self.loan_a.ids)
+        self.assertEqual(loans['watermark_to']['id'], self.loan_a.id)
+
+        # Nothing changed since the last run: the next run exports nothing
+        loans, rows = self._export_loans()
+        self.assertEqual(rows, [])
@@ -0,0 +1,69 @@
+import base64
+from datetime import timedelta
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestEmiReport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bank = cls.env['res.bank'].create({'name': 'Report Bank'})
+        today = fields.Date.today()
+        cls.loan, cls.other_loan = cls.env['debt.details'].create([{
+            'loan_no': f'REPORT-{index}',
+            'loan_type': 'personal',
+            'loan_bank': cls.bank.id,
+            'sanctioned_amount': 100000,
+            'actual_amount': 100000,
+            'loan_tenor': 24,
+            'starting_date': today,
+            'first_emi': today,
+        } for index in range(2)])
+
+    def _report_attachment_id(self, loan):
+        return int(loan.action_generate_emi_report()['url'].split('/')[3].split('?')[0])
+
+    def _create_attachment(self, loan, days_old, description=False):
+        attachment = self.env['ir.attachment'].create({
+            'name': f'EMI_History_{loan.loan_no}.xlsx',
+            'datas': base64.b64encode(b'report'),
+            'description': description,
+            'res_model': 'debt.details',
+            'res_id': loan.id,
+        })
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE ir_attachment SET create_date = %s WHERE id = %s",
+                            [fields.Datetime.now() - timedelta(days=days_old), attachment.id])
+        attachment.invalidate_recordset(['create_date'])
+        return attachment
+
+    def test_report_cache(self):
+        attachment_id = self._report_attachment_id(self.loan)
+        self.assertEqual(self._report_attachment_id(self.loan), attachment_id)
+
+        # Renaming the bank printed on the report invalidates the cached report
+        self.bank.name = 'Renamed Report Bank'
+        self.env.flush_all()
+        self.assertNotEqual(self._report_attachment_id(self.loan), attachment_id)
+
+    def test_gc_emi_report_attachments(self):
+        # Superseded 20 days ago: removed
+        old_report = self._create_attachment(self.loan, 30, 'emi_report:old')
+        # Latest report, created long ago: kept
+        latest_report = self._create_attachment(self.loan, 20, 'emi_report:latest')
+        # Created long ago but superseded a minute ago: kept during the retention period
+        recently_superseded = self._create_attachment(self.other_loan, 30, 'emi_report:old')
+        other_latest = self._create_attachment(self.other_loan, 0, 'emi_report:latest')
+        # Uploaded by a user with the same name, not tagged by the report cache: kept
+        upload = self._create_attachment(self.loan, 30)
+
+        self.env['debt.details'].gc_emi_report_attachments()
+
+        self.assertFalse(old_report.exists())
+        self.assertEqual(
+            (latest_report | recently_superseded | other_latest | upload).exists(),
+            latest_report | recently_superseded | other_latest | upload,
+        )
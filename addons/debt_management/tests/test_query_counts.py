@@ -0,0 +1,165 @@
+from dateutil.relativedelta import relativedelta
+from odoo import fields
+from odoo.tests import TransactionCase, tagged, warmup
+from odoo.addons.debt_management import insert_bank_names_to_res_bank
+
+# Number of records (loans, EMI rows or bank names) each entry point is run against
+RECORD_COUNTS = (1, 10, 100)
+
+
+@tagged('post_install', '-at_install')
+class TestQueryCounts(TransactionCase):
+    """
+    Every entry point is first run on a single record, which pins its query budget.
+    The runs on 10 and 100 records must stay within that budget, plus the few extra
+    statements the ORM needs to INSERT/UPDATE rows in batches of 100. A query per
+    record adds 9 or 99 queries and fails the test.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bank = cls.env['res.bank'].create({'name': 'Query Count Bank'})
+        cls.today = fields.Date.today()
+
+    def _loan_vals(self, count, prefix, emi_rows=6):
+        first_emi = self.today - relativedelta(months=emi_rows - 1)
+        return [{
+            'loan_no': f'{prefix}-{index}',
+            'loan_type': 'small_business',
+            'loan_bank': self.bank.id,
+            'sanctioned_amount': 100000,
+            'actual_amount': 100000,
+            'interest_rate': 9.0,
+            'loan_tenor': 120,
+            'starting_date': first_emi,
+            'first_emi': first_emi,
+        } for index in range(count)]
+
+    def _create_loans(self, count, prefix, emi_rows=6):
+        return self.env['debt.details'].create(self._loan_vals(count, prefix, emi_rows))
+
+    def _assert_query_budget(self, prepare, run, slack=None):
+        """
+        Call run(prepare(count)) for each count of RECORD_COUNTS. The queries of the
+        single record run set the budget; slack maps a count to the extra queries allowed.
+        """
+        budget = None
+        for count in RECORD_COUNTS:
+            with self.subTest(count=count):
+                records = prepare(count)
+                self.env.flush_all()
+                self.env.invalidate_all()
+                if budget is None:
+                    start = self.cr.sql_log_count
+                    run(records)
+                    self.env.flush_all()
+                    budget = self.cr.sql_log_count - start
+                else:
+                    with self.assertQueryCount(budget + (slack or {}).get(count, 0)):
+                        run(records)
+
+    @warmup
+    def test_create(self):
+        # 6 EMI rows per loan: 600 history rows need 5 more INSERT batches at 100 loans
+        self._assert_query_budget(
+            lambda count: self._loan_vals(count, f'CREATE-{count}'),
+            lambda vals_list: self.env['debt.details'].create(vals_list),
+            slack={100: 6},
+        )
+
+    @warmup
+    def test_write(self):
+        self._assert_query_budget(
+            lambda count: self._create_loans(count, f'WRITE-{count}'),
+            lambda loans: loans.write({'actual_amount': 90000, 'interest_rate': 10.0, 'loan_tenor': 96}),
+            slack={100: 6},
+        )
+
+    @warmup
+    def test_action_done(self):
+        def prepare(count):
+            loans = self._create_loans(count, f'DONE-{count}')
+            loans.write({
+                'advance_pay': True,
+                'advance_type': 'partial',
+                'reduction_type': 'emi_reduction',
+                'advance_amount': 1000,
+            })
+            return loans
+
+        self._assert_query_budget(prepare, lambda loans: loans.action_done(), slack={100: 2})
+
+    @warmup
+    def test_action_view_emi(self):
+        # The loan has as many EMI rows as the record count
+        self._assert_query_budget(
+            lambda count: self._create_loans(1, f'VIEW-{count}', emi_rows=count),
+            lambda loan: loan.action_view_emi(),
+        )
+
+    @warmup
+    def test_action_generate_emi_report(self):
+        # The loan has as many EMI rows as the record count
+        self._assert_query_budget(
+            lambda count: self._create_loans(1, f'REPORT-{count}', emi_rows=count),
+            lambda loan: loan.action_generate_emi_report(),
+            slack={100: 1},
+        )
+
+    @warmup
+    def test_action_generate_emi_report_cached(self):
+        def prepare(count):
+            loan = self._create_loans(1, f'CACHED-{count}', emi_rows=count)
+            loan.action_generate_emi_report()
+            return loan
+
+        self._assert_query_budget(prepare, lambda loan: loan.action_generate_emi_report())
+
+    @warmup
+    def test_update_emi_dates_daily(self):
+        def prepare(count):
+            # Only the loans of this run exist, and each has an EMI due today
+            self.env['debt.details'].search([]).unlink()
+            loans = self._create_loans(count, f'CRON-{count}')
+            loans.emi_date = self.today
+            self.last_emi = self.env['debt.emi.history'].search([], order='id desc', limit=1)
+            return loans
+
+        def run(loans):
+            self.env['debt.details'].update_emi_dates_daily()
+            # The cron records the EMI due today for every loan
+            self.assertEqual(self.env['debt.emi.history'].search_count(
+                [('id', '>', self.last_emi.id), ('due_date', '=', self.today)]), len(loans))
+
+        self._assert_query_budget(prepare, run, slack={100: 2})
+
+    @warmup
+    def test_send_emi_reminder_email(self):
+        def prepare(count):
+            # Only the loans of this run exist, and each has a reminder due today
+            self.env['debt.details'].search([]).unlink()
+            loans = self._create_loans(count, f'REMIND-{count}')
+            loans.write({'emi_date': self.today + relativedelta(days=7), 'reminder_days': 7})
+            return loans
+
+        def run(loans):
+            self.env['debt.details'].send_emi_reminder_email()
+            self.assertEqual(self.env['mail.mail'].search_count(
+                [('model', '=', 'debt.details'), ('res_id', 'in', loans.ids)]), len(loans))
+
+        self._assert_query_budget(prepare, run, slack={100: 4})
+
+    @warmup
+    def test_import_bank_names(self):
+        def run(bank_names):
+            insert_bank_names_to_res_bank(self.env, bank_names)
+            # The empty and NaN cells are skipped
+            self.assertEqual(self.env['res.bank'].search_count(
+                [('name', '=like', f'Query Count Bank {len(bank_names) - 2}-%')]), len(bank_names) - 2)
+
+        self._assert_query_budget(
+            lambda count: [f'Query Count Bank {count}-{index}' for index in range(count)] + [float('nan'), ''],
+            run,
+            slack={100: 1},
+        )
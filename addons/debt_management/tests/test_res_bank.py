@@ -0,0 +1,61 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestResBankSearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.hdfc_bank = cls.env['res.bank'].create({'name': 'HDFC Bank', 'bic': 'HDFC0000001'})
+        cls.hdfc_finance = cls.env['res.bank'].create({'name': 'Credila HDFC Finance'})
+        cls.axis_bank = cls.env['res.bank'].create({'name': 'Axis Bank', 'bic': 'UTIB0000001'})
+
+    def _name_search_ids(self, name, **kwargs):
+        return [bank_id for bank_id, _name in self.env['res.bank'].name_search(name, **kwargs)]
+
+    def test_normalized_name(self):
+        bank = self.env['res.bank'].create({'name': '  Société  Générale, Ltd.'})
+        self.assertEqual(bank.normalized_name, 'societe generale ltd')
+
+    def test_prefix_ranked_before_contains(self):
+        bank_ids = self._name_search_ids('hdfc')
+        self.assertLess(bank_ids.index(self.hdfc_bank.id), bank_ids.index(self.hdfc_finance.id))
+
+    def test_domain(self):
+        bank_ids = self._name_search_ids('hdfc', domain=[('id', '!=', self.hdfc_bank.id)])
+        self.assertIn(self.hdfc_finance.id, bank_ids)
+        self.assertNotIn(self.hdfc_bank.id, bank_ids)
+
+    def test_fuzzy_match(self):
+        if not self.env.registry.has_trigram:
+            self.skipTest("pg_trgm is not installed")
+        self.assertIn(self.hdfc_bank.id, self._name_search_ids('hdfc bnak'))
+
+    def test_fuzzy_match_filters(self):
+        if not self.env.registry.has_trigram:
+            self.skipTest("pg_trgm is not installed")
+        kotak_bank, kotak_archived = self.env['res.bank'].create([
+            {'name': 'Kotak Mahindra Bank'},
+            {'name': 'Kotak Mahindra Bamk', 'active': False},
+        ])
+        # Archived banks and banks excluded by the domain do not use up the limit
+        self.assertEqual(self._name_search_ids('kotak mahindra bnak', limit=1), [kotak_bank.id])
+        self.assertNotIn(kotak_archived.id, self._name_search_ids('kotak mahindra bnak'))
+        self.assertEqual(self._name_search_ids(
+            'kotak mahindra bnak', domain=[('id', '!=', self.hdfc_bank.id)], limit=1), [kotak_bank.id])
+
+    def test_bic_match(self):
+        self.assertEqual(self._name_search_ids('UTIB0000001'), [self.axis_bank.id])
+        # A code also matching a bank name still returns the bank with that BIC
+        utib_holdings = self.env['res.bank'].create({'name': 'UTIB Holdings'})
+        bank_ids = self._name_search_ids('UTIB')
+        self.assertIn(self.axis_bank.id, bank_ids)
+        self.assertIn(utib_holdings.id, bank_ids)
+
+    def test_cache_invalidated_on_rename(self):
+        self.assertNotIn(self.axis_bank.id, self._name_search_ids('zenith'))
+        self.axis_bank.name = 'Zenith Bank'
+        self.assertIn(self.axis_bank.id, self._name_search_ids('zenith'))
+        self.axis_bank.active = False
+        self.assertNotIn(self.axis_bank.id, self._name_search_ids('zenith'))